@@ -0,0 +1,122 @@
+import argparse
+import time
+
+from generator import generate_puzzle
+from logic import *
+
+
+def solve_model_check(puzzle):
+    return [model_check(puzzle.knowledge, puzzle.knights[name])
+            for name in puzzle.characters]
+
+
+def solve_simplified(puzzle):
+    knowledge = simplify(puzzle.knowledge)
+    return [model_check(knowledge, puzzle.knights[name])
+            for name in puzzle.characters]
+
+
+def solve_parallel(puzzle):
+    return [parallel_model_check(puzzle.knowledge, puzzle.knights[name])
+            for name in puzzle.characters]
+
+
+def solve_incremental(puzzle):
+    knowledge = IncrementalKnowledge(*puzzle.knowledge.conjuncts)
+    return [knowledge.entails(puzzle.knights[name])
+            for name in puzzle.characters]
+
+
+def solve_counting(puzzle):
+
+    # A character is a knight if no model makes them a knave
+    return [
+        count_models(And(puzzle.knowledge, Not(puzzle.knights[name]))) == 0
+        for name in puzzle.characters
+    ]
+
+
+# Every backend answers, for each character, whether it is a knight
+BACKENDS = {
+    "model_check": solve_model_check,
+    "simplified": solve_simplified,
+    "parallel": solve_parallel,
+    "incremental": solve_incremental,
+    "counting": solve_counting,
+}
+
+# Backends that enumerate every model, and so are skipped on large puzzles
+BRUTE_FORCE = {"model_check", "simplified", "parallel"}
+
+
+def benchmark(sizes, statements, backends, max_symbols, seed):
+    """
+    Times each backend on generated puzzles of growing size,
+    returning one row of results per puzzle.
+    """
+    results = []
+    for n in sizes:
+        puzzle = generate_puzzle(n, statements * n, seed=seed)
+        symbols = len(puzzle.symbols())
+        expected = [puzzle.solution[name] for name in puzzle.characters]
+        _, size, simplified_size = simplify_report(puzzle.knowledge)
+        row = {
+            "characters": n,
+            "statements": len(puzzle.statements),
+            "symbols": symbols,
+            "models": 2 ** symbols,
+            "worlds": count_models(puzzle.knowledge),
+            "size": size,
+            "simplified": simplified_size,
+            "times": {}
+        }
+        for backend in backends:
+
+            # Brute-force enumeration doubles with every symbol
+            if backend in BRUTE_FORCE and symbols > max_symbols:
+                row["times"][backend] = None
+                continue
+            start = time.perf_counter()
+            answers = BACKENDS[backend](puzzle)
+            row["times"][backend] = time.perf_counter() - start
+            if answers != expected:
+                raise Exception(f"{backend} gave a wrong answer for n = {n}")
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark model checking on generated puzzles."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[2, 3, 4, 5, 6, 7, 8])
+    parser.add_argument("--statements", type=int, default=2,
+                        help="statements per character")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS),
+                        default=list(BACKENDS))
+    parser.add_argument("--max-symbols", type=int, default=16,
+                        help="skip brute-force backends on larger puzzles")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = benchmark(args.sizes, args.statements, args.backends,
+                        args.max_symbols, args.seed)
+
+    header = (f"{'N':>3} {'M':>4} {'models':>10} {'worlds':>6} {'size':>6} "
+              f"{'simple':>6}")
+    for backend in args.backends:
+        header += f" {backend:>12}"
+    print(header)
+    for row in results:
+        line = (f"{row['characters']:>3} {row['statements']:>4} "
+                f"{row['models']:>10} {row['worlds']:>6} {row['size']:>6} "
+                f"{row['simplified']:>6}")
+        for backend in args.backends:
+            seconds = row["times"][backend]
+            line += f" {'-':>12}" if seconds is None else f" {seconds:>11.4f}s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
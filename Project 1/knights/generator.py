@@ -0,0 +1,157 @@
+import itertools
+import random
+import string
+import sys
+
+from logic import *
+
+
+class Puzzle():
+    """
+    Randomly generated Knights and Knaves puzzle
+    """
+
+    def __init__(self, characters, statements, solution):
+
+        # Characters, and what each of them says
+        self.characters = characters
+        self.statements = statements
+
+        # Whether each character is a knight, in the only consistent world
+        self.solution = solution
+
+        self.knights = {name: knight(name) for name in characters}
+        self.knaves = {name: knave(name) for name in characters}
+
+        # Each character is either a knight or a knave, and a knight's
+        # statement is true exactly when the knave's statement would be false
+        self.knowledge = And()
+        for name in characters:
+            self.knowledge.add(Or(self.knights[name], self.knaves[name]))
+            self.knowledge.add(
+                Not(And(self.knights[name], self.knaves[name]))
+            )
+        for speaker, claim in statements:
+            self.knowledge.add(Biconditional(self.knights[speaker], claim))
+
+    def symbols(self):
+        """
+        Returns the knight and knave symbols of every character.
+        """
+        return [symbol for name in self.characters
+                for symbol in (self.knights[name], self.knaves[name])]
+
+    def print(self):
+        """
+        Prints the statements of the puzzle and its solution.
+        """
+        for speaker, claim in self.statements:
+            print(f"{speaker} says \"{claim.formula()}\"")
+        for name in self.characters:
+            kind = "Knight" if self.solution[name] else "Knave"
+            print(f"    {name} is a {kind}")
+
+
+def knight(name):
+    return Symbol(f"{name} is a Knight")
+
+
+def knave(name):
+    return Symbol(f"{name} is a Knave")
+
+
+def character_names(n):
+    """
+    Returns `n` character names: A to Z, then A1, B1, ...
+    """
+    letters = string.ascii_uppercase
+    return [
+        letters[i % 26] + (str(i // 26) if i >= 26 else "")
+        for i in range(n)
+    ]
+
+
+def random_claim(rng, characters, depth=1):
+    """
+    Returns a random sentence one character could say about the others.
+    """
+    if depth == 0 or rng.random() < 0.4:
+        name = rng.choice(characters)
+        return knight(name) if rng.random() < 0.5 else knave(name)
+
+    kind = rng.choice(["and", "or", "same", "not"])
+    if kind == "not":
+        return Not(random_claim(rng, characters, depth - 1))
+    left = random_claim(rng, characters, depth - 1)
+    right = random_claim(rng, characters, depth - 1)
+    if kind == "and":
+        return And(left, right)
+    if kind == "or":
+        return Or(left, right)
+
+    # "X and Y are of the same kind"
+    return Biconditional(left, right)
+
+
+def truth_value(claim, solution):
+    """
+    Evaluates a claim given which characters are knights.
+    """
+    model = {}
+    for name, is_knight in solution.items():
+        model[knight(name).name] = is_knight
+        model[knave(name).name] = not is_knight
+    return claim.evaluate(model)
+
+
+def consistent_worlds(knowledge, limit=2):
+    """
+    Counts (up to `limit`) the assignments of knights and knaves in
+    which the puzzle's knowledge is true, stopping as soon as `limit`
+    models have been found.
+    """
+    return len(list(itertools.islice(enumerate_models(knowledge), limit)))
+
+
+def generate_puzzle(n, m, seed=None, depth=2, attempts=1000):
+    """
+    Returns a random Puzzle with `n` characters making `m` statements
+    that has exactly one solution.
+    """
+    rng = random.Random(seed)
+    characters = character_names(n)
+    for _ in range(attempts):
+
+        # Choose the hidden solution first, so the puzzle is always consistent
+        solution = {name: rng.random() < 0.5 for name in characters}
+        statements = []
+        for _ in range(m):
+            speaker = rng.choice(characters)
+            claim = random_claim(rng, characters, depth)
+
+            # Knights only say true things, knaves only say false things
+            if truth_value(claim, solution) != solution[speaker]:
+                claim = Not(claim)
+            statements.append((speaker, claim))
+
+        # The knowledge base is built once, and only searched until a
+        # second solution turns up
+        puzzle = Puzzle(characters, statements, solution)
+        if consistent_worlds(puzzle.knowledge) == 1:
+            return puzzle
+
+    raise Exception(f"no solvable puzzle found in {attempts} attempts")
+
+
+def main():
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python generator.py characters statements [seed]")
+    n = int(sys.argv[1])
+    m = int(sys.argv[2])
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else None
+    puzzle = generate_puzzle(n, m, seed)
+    puzzle.print()
+
+
+if __name__ == "__main__":
+    main()
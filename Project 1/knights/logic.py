@@ -1,4 +1,6 @@
 import itertools
+import multiprocessing
+import os
 
 
 class Sentence():
@@ -15,6 +17,10 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def size(self):
+        """Returns the number of nodes in the logical sentence."""
+        return 1
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -42,6 +48,31 @@ class Sentence():
             return f"({s})"
 
 
+class Constant(Sentence):
+
+    def __init__(self, value):
+        self.value = bool(value)
+
+    def __eq__(self, other):
+        return isinstance(other, Constant) and self.value == other.value
+
+    def __hash__(self):
+        return hash(("constant", self.value))
+
+    def __repr__(self):
+        return "TRUE" if self.value else "FALSE"
+
+    def evaluate(self, model):
+        return self.value
+
+    def formula(self):
+        return "True" if self.value else "False"
+
+
+TRUE = Constant(True)
+FALSE = Constant(False)
+
+
 class Symbol(Sentence):
 
     def __init__(self, name):
@@ -92,6 +123,9 @@ class Not(Sentence):
     def symbols(self):
         return self.operand.symbols()
 
+    def size(self):
+        return 1 + self.operand.size()
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -129,6 +163,9 @@ class And(Sentence):
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def size(self):
+        return 1 + sum(conjunct.size() for conjunct in self.conjuncts)
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -160,6 +197,9 @@ class Or(Sentence):
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def size(self):
+        return 1 + sum(disjunct.size() for disjunct in self.disjuncts)
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -191,6 +231,9 @@ class Implication(Sentence):
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def size(self):
+        return 1 + self.antecedent.size() + self.consequent.size()
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -224,40 +267,531 @@ class Biconditional(Sentence):
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
+    def size(self):
+        return 1 + self.left.size() + self.right.size()
+
+
+def negate(sentence):
+    """Returns the negation of a simplified sentence."""
+    if isinstance(sentence, Constant):
+        return FALSE if sentence.value else TRUE
+    if isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+def simplify_junction(kind, parts):
+    """Simplifies the operands of an And (kind is And) or an Or."""
+
+    # For And, FALSE absorbs everything and TRUE can be dropped; Or is dual
+    absorbing = FALSE if kind is And else TRUE
+    identity = TRUE if kind is And else FALSE
+
+    operands = []
+    seen = set()
+    pending = list(reversed(parts))
+    while pending:
+        part = simplify(pending.pop())
+
+        # Flatten nested conjunctions (or disjunctions)
+        if isinstance(part, kind):
+            operands_of = part.conjuncts if kind is And else part.disjuncts
+            pending.extend(reversed(operands_of))
+            continue
+        if part == absorbing:
+            return absorbing
+        if part == identity or part in seen:
+            continue
+
+        # P and ¬P together are a contradiction (or, for Or, a tautology)
+        if negate(part) in seen:
+            return absorbing
+        seen.add(part)
+        operands.append(part)
+
+    if not operands:
+        return identity
+    if len(operands) == 1:
+        return operands[0]
+    return kind(*operands)
+
+
+def simplify(sentence):
+    """
+    Returns an equivalent, simplified logical sentence.
+
+    Folds constants, flattens nested And/Or, removes duplicate operands
+    and removes tautologies such as P <=> P or P ∨ ¬P.
+    """
+    if isinstance(sentence, (Symbol, Constant)):
+        return sentence
+
+    if isinstance(sentence, Not):
+        return negate(simplify(sentence.operand))
+
+    if isinstance(sentence, And):
+        return simplify_junction(And, sentence.conjuncts)
+
+    if isinstance(sentence, Or):
+        return simplify_junction(Or, sentence.disjuncts)
+
+    if isinstance(sentence, Implication):
+        antecedent = simplify(sentence.antecedent)
+        consequent = simplify(sentence.consequent)
+        if antecedent == TRUE:
+            return consequent
+        if antecedent == FALSE or consequent == TRUE:
+            return TRUE
+        if consequent == FALSE:
+            return negate(antecedent)
+        if antecedent == consequent:
+            return TRUE
+        return Implication(antecedent, consequent)
+
+    if isinstance(sentence, Biconditional):
+        left = simplify(sentence.left)
+        right = simplify(sentence.right)
+        if left == right:
+            return TRUE
+        if left == negate(right):
+            return FALSE
+        if isinstance(left, Constant):
+            return right if left.value else negate(right)
+        if isinstance(right, Constant):
+            return left if right.value else negate(left)
+        return Biconditional(left, right)
+
+    raise TypeError("must be a logical sentence")
+
+
+def simplify_report(sentence):
+    """
+    Simplifies a sentence and returns (simplified, size before, size after),
+    so callers can report how much smaller the formula got.
+    """
+    simplified = simplify(sentence)
+    return simplified, sentence.size(), simplified.size()
+
+
+def check_all(knowledge, query, symbols, model):
+    """Checks if knowledge base entails query, given a particular model."""
+
+    # If model has an assignment for each symbol
+    if not symbols:
+
+        # If knowledge base is true in model, then query must also be true
+        if knowledge.evaluate(model):
+            return query.evaluate(model)
+        return True
+    else:
+
+        # Choose one of the remaining unused symbols
+        remaining = symbols.copy()
+        p = remaining.pop()
+
+        # Create a model where the symbol is true
+        model_true = model.copy()
+        model_true[p] = True
+
+        # Create a model where the symbol is false
+        model_false = model.copy()
+        model_false[p] = False
+
+        # Ensure entailment holds in both models
+        return (check_all(knowledge, query, remaining, model_true) and
+                check_all(knowledge, query, remaining, model_false))
+
 
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
     # Get all symbols in both knowledge and query
     symbols = set.union(knowledge.symbols(), query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def check_shard(shard):
+    """Checks entailment within one shard of the model space."""
+    knowledge, query, symbols, model = shard
+    return check_all(knowledge, query, symbols, model)
+
+
+def parallel_model_check(knowledge, query, shard_bits=None, processes=None):
+    """
+    Checks if knowledge base entails query, enumerating models in parallel.
+
+    The model space is split into 2^shard_bits shards by fixing the first
+    `shard_bits` symbols, and the shards are checked in a process pool.
+    As soon as one shard finds a counter-model, all workers are stopped.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    # By default, make a few shards per worker so that uneven shards balance
+    if shard_bits is None:
+        shard_bits = (4 * processes - 1).bit_length()
+    shard_bits = max(0, min(shard_bits, len(symbols)))
+
+    # Fix the first symbols in every possible way, leave the rest free
+    fixed = symbols[:shard_bits]
+    free = set(symbols[shard_bits:])
+    shards = [
+        (knowledge, query, free, dict(zip(fixed, values)))
+        for values in itertools.product([True, False], repeat=shard_bits)
+    ]
+
+    # Not worth starting processes for a single shard
+    if processes == 1 or len(shards) == 1:
+        return all(check_shard(shard) for shard in shards)
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for entailed in pool.imap_unordered(check_shard, shards):
+            if not entailed:
+                return False
+        return True
+    finally:
+        # Stops any worker still enumerating once the answer is known
+        pool.terminate()
+        pool.join()
+
+
+def assign(sentence, model):
+    """
+    Returns the sentence simplified after replacing every symbol
+    assigned in model with its truth value.
+    """
+    def substitute(sentence):
+        if isinstance(sentence, Symbol):
+            if sentence.name in model:
+                return TRUE if model[sentence.name] else FALSE
+            return sentence
+        if isinstance(sentence, Constant):
+            return sentence
+        if isinstance(sentence, Not):
+            return Not(substitute(sentence.operand))
+        if isinstance(sentence, And):
+            return And(*[substitute(c) for c in sentence.conjuncts])
+        if isinstance(sentence, Or):
+            return Or(*[substitute(d) for d in sentence.disjuncts])
+        if isinstance(sentence, Implication):
+            return Implication(substitute(sentence.antecedent),
+                               substitute(sentence.consequent))
+        if isinstance(sentence, Biconditional):
+            return Biconditional(substitute(sentence.left),
+                                 substitute(sentence.right))
+        raise TypeError("must be a logical sentence")
+
+    return simplify(substitute(sentence))
+
+
+def conjuncts_of(sentence):
+    """
+    Returns the list of conjuncts of a simplified sentence,
+    or None if the sentence is unsatisfiable.
+    """
+    if sentence == FALSE:
+        return None
+    if sentence == TRUE:
+        return []
+    if isinstance(sentence, And):
+        return list(sentence.conjuncts)
+    return [sentence]
+
+
+class Conditioner():
+    """
+    Shared state for model counting and enumeration: splits conjuncts
+    into components and assigns symbols, caching the symbols of each
+    conjunct so they are only computed once.
+    """
+
+    def __init__(self):
+        self.symbol_cache = {}
+
+    def symbols(self, conjunct):
+        if conjunct not in self.symbol_cache:
+            self.symbol_cache[conjunct] = frozenset(conjunct.symbols())
+        return self.symbol_cache[conjunct]
+
+    def all_symbols(self, conjuncts):
+        return set().union(*[self.symbols(c) for c in conjuncts])
+
+    def literal(self, conjuncts):
+        """
+        Returns (symbol, value) for a conjunct that is a single literal,
+        which forces its symbol, or None if there is none.
+        """
+        for conjunct in conjuncts:
+            if isinstance(conjunct, Symbol):
+                return conjunct.name, True
+            if (isinstance(conjunct, Not)
+                    and isinstance(conjunct.operand, Symbol)):
+                return conjunct.operand.name, False
+        return None
+
+    def choose(self, conjuncts):
+        """Chooses the symbol to branch on next."""
+
+        # A conjunct that is a single literal forces its symbol
+        literal = self.literal(conjuncts)
+        if literal is not None:
+            return literal[0]
+
+        # Otherwise, the symbol that appears in the most conjuncts
+        counts = {}
+        for conjunct in conjuncts:
+            for symbol in self.symbols(conjunct):
+                counts[symbol] = counts.get(symbol, 0) + 1
+        return max(sorted(counts), key=lambda symbol: counts[symbol])
+
+    def condition(self, conjuncts, symbol, value):
+        """
+        Returns the conjuncts after assigning value to symbol,
+        or None if that makes them unsatisfiable.
+        """
+        result = []
+        for conjunct in conjuncts:
+            if symbol not in self.symbols(conjunct):
+                result.append(conjunct)
+                continue
+            parts = conjuncts_of(assign(conjunct, {symbol: value}))
+            if parts is None:
+                return None
+            result.extend(parts)
+        return result
+
+    def components(self, conjuncts):
+        """Splits conjuncts into groups that share no symbols."""
+        groups = []
+        for conjunct in conjuncts:
+            symbols = set(self.symbols(conjunct))
+            members = [conjunct]
+
+            # Merge every existing group this conjunct connects to
+            remaining = []
+            for group_symbols, group_members in groups:
+                if group_symbols & symbols:
+                    symbols |= group_symbols
+                    members.extend(group_members)
+                else:
+                    remaining.append((group_symbols, group_members))
+            remaining.append((symbols, members))
+            groups = remaining
+        return groups
+
+
+def count_models(knowledge, symbols=None):
+    """
+    Returns the number of models over `symbols` (by default, the symbols
+    of knowledge) in which the knowledge base is true.
+
+    Independent components are counted separately and multiplied,
+    and the count of every sub-formula met while branching is cached.
+    """
+    if symbols is None:
+        symbols = knowledge.symbols()
+    symbols = set(symbols) | knowledge.symbols()
+    conjuncts = conjuncts_of(simplify(knowledge))
+    if conjuncts is None:
+        return 0
+
+    conditioner = Conditioner()
+
+    # Counts of cached sub-formulas, and how many symbols each one has
+    cache = {}
+    cache_symbols = {}
+
+    def count(conjuncts, symbols):
+        """Counts models of conjuncts over exactly `symbols`."""
+        if not conjuncts:
+            return 2 ** len(symbols)
+        key = frozenset(conjuncts)
+        if key in cache:
+            return cache[key] * 2 ** (len(symbols) - cache_symbols[key])
+
+        constrained = conditioner.all_symbols(conjuncts)
+        groups = conditioner.components(conjuncts)
+        if len(groups) > 1:
+            result = 1
+            for group_symbols, members in groups:
+                result *= count(members, group_symbols)
+                if result == 0:
+                    break
+        else:
+            p = conditioner.choose(conjuncts)
+            result = 0
+            for value in [True, False]:
+                conditioned = conditioner.condition(conjuncts, p, value)
+                if conditioned is not None:
+                    result += count(conditioned, constrained - {p})
+
+        # Cache the count over the constrained symbols only
+        cache[key] = result
+        cache_symbols[key] = len(constrained)
+        return result * 2 ** (len(symbols) - len(constrained))
+
+    return count(conjuncts, symbols)
+
+
+def enumerate_models(knowledge, symbols=None):
+    """
+    Lazily yields every model (a dict from symbol name to truth value)
+    over `symbols` in which the knowledge base is true.
+    """
+    if symbols is None:
+        symbols = knowledge.symbols()
+    symbols = sorted(set(symbols) | knowledge.symbols())
+    conjuncts = conjuncts_of(simplify(knowledge))
+    if conjuncts is None:
+        return
+
+    conditioner = Conditioner()
+
+    def extend(conjuncts, model):
+        if not conjuncts:
+
+            # Every remaining symbol is unconstrained
+            free = [symbol for symbol in symbols if symbol not in model]
+            for values in itertools.product([True, False], repeat=len(free)):
+                complete = model.copy()
+                complete.update(zip(free, values))
+                yield complete
+            return
+
+        p = conditioner.choose(conjuncts)
+        for value in [True, False]:
+            conditioned = conditioner.condition(conjuncts, p, value)
+            if conditioned is not None:
+                model[p] = value
+                yield from extend(conditioned, model)
+                del model[p]
+
+    yield from extend(conjuncts, dict())
+
+
+def has_model(conjuncts, conditioner, cache):
+    """
+    Returns whether some assignment makes every conjunct true, checking
+    independent components separately and branching like count_models,
+    but stopping at the first model found. The answer for every set of
+    conjuncts met while branching is kept in `cache`.
+    """
+    if not conjuncts:
+        return True
+    key = frozenset(conjuncts)
+    if key in cache:
+        return cache[key]
+
+    groups = conditioner.components(conjuncts)
+    if len(groups) > 1:
+        result = all(has_model(members, conditioner, cache)
+                     for _, members in groups)
+    else:
+        p = conditioner.choose(conjuncts)
+        result = False
+        for value in [True, False]:
+            conditioned = conditioner.condition(conjuncts, p, value)
+            if (conditioned is not None
+                    and has_model(conditioned, conditioner, cache)):
+                result = True
+                break
+    cache[key] = result
+    return result
+
+
+class IncrementalKnowledge():
+    """
+    Knowledge base that keeps its facts simplified between additions.
+
+    Instead of the models of the knowledge base, which can be
+    exponentially many, it keeps the literals its facts force and the
+    simplified conjuncts left once those are assigned. Every call to
+    `add` only conditions the new fact on the forced literals, `push`
+    and `pop` save and restore that state, and `entails` answers
+    queries under temporary assumptions without changing it.
+    """
+
+    def __init__(self, *sentences):
+        self.facts = []
+        self.symbols = set()
+
+        # Literals known to hold, and the conjuncts left after assigning
+        # them, or None once the facts contradict each other
+        self.forced = dict()
+        self.conjuncts = []
+        self.scopes = []
+
+        # Whether each set of conjuncts has a model, kept across queries
+        # until the next fact is added
+        self.conditioner = Conditioner()
+        self.cache = {}
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence, assigning every literal it forces."""
+        Sentence.validate(sentence)
+        sentence = simplify(sentence)
+        self.facts.append(sentence)
+        self.symbols = self.symbols | sentence.symbols()
+        self.cache = {}
+        if self.conjuncts is None:
+            return
+        parts = conjuncts_of(assign(sentence, self.forced))
+        if parts is None:
+            self.conjuncts = None
+            return
+
+        # Assign single literals until none is left; the saved scopes
+        # still hold the previous dict and list, so both are new objects
+        forced = dict(self.forced)
+        conjuncts = self.conjuncts + parts
+        while conjuncts:
+            literal = self.conditioner.literal(conjuncts)
+            if literal is None:
+                break
+            symbol, value = literal
+            forced[symbol] = value
+            conjuncts = self.conditioner.condition(conjuncts, symbol, value)
+        self.forced = forced
+        self.conjuncts = conjuncts
+
+    def push(self):
+        """Opens a new scope; facts added after it are removed by `pop`."""
+        self.scopes.append((len(self.facts), self.symbols, self.forced,
+                            self.conjuncts))
+
+    def pop(self):
+        """Discards every fact added since the matching `push`."""
+        if not self.scopes:
+            raise Exception("no scope to pop")
+        count, self.symbols, self.forced, self.conjuncts = self.scopes.pop()
+        del self.facts[count:]
+
+    def satisfiable(self):
+        """Returns whether any model satisfies the knowledge base."""
+        return (self.conjuncts is not None
+                and has_model(self.conjuncts, self.conditioner, self.cache))
+
+    def entails(self, query, assumptions=()):
+        """
+        Checks if the knowledge base, together with the given
+        assumptions, entails query: that is, whether the knowledge base,
+        the assumptions and the negated query have no model together.
+        """
+        Sentence.validate(query)
+        for assumption in assumptions:
+            Sentence.validate(assumption)
+        if self.conjuncts is None:
+            return True
+        conjuncts = list(self.conjuncts)
+        for sentence in [*assumptions, Not(query)]:
+            parts = conjuncts_of(assign(sentence, self.forced))
+            if parts is None:
+                return True
+            conjuncts.extend(parts)
+        return not has_model(conjuncts, self.conditioner, self.cache)
@@ -0,0 +1,320 @@
+import math
+import random
+import time
+
+
+def split_components(constraints):
+    """
+    Splits constraints, given as (cells, count) pairs, into groups
+    that share no cells, so that each group can be solved on its own.
+    """
+    parent = {}
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    # Join all cells of each constraint into one set
+    for cells, _ in constraints:
+        cells = list(cells)
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        for cell in cells[1:]:
+            parent[find(cell)] = find(cells[0])
+
+    groups = {}
+    for constraint in constraints:
+        cells, _ = constraint
+        if cells:
+            root = find(next(iter(cells)))
+            groups.setdefault(root, []).append(constraint)
+    return list(groups.values())
+
+
+def solutions(constraints, randomize=False, budget=None):
+    """
+    Yields every set of mine cells that satisfies all constraints,
+    by backtracking over the cells one at a time and pruning as soon
+    as a constraint can no longer be met.
+
+    With `randomize`, values are tried in random order, so the first
+    solution yielded is a random one. With a `budget`, the search stops
+    after trying that many assignments.
+    """
+    # Order cells constraint by constraint, so that neighbors are close
+    cells = []
+    watch = {}
+    for k, (group, _) in enumerate(constraints):
+        for cell in sorted(group):
+            if cell not in watch:
+                watch[cell] = []
+                cells.append(cell)
+            watch[cell].append(k)
+
+    # Mines still needed, and cells still unassigned, in each constraint
+    need = [count for _, count in constraints]
+    free = [len(group) for group, _ in constraints]
+
+    def assign(cell, value, sign):
+        for k in watch[cell]:
+            free[k] -= sign
+            if value:
+                need[k] -= sign
+
+    def consistent(cell):
+        return all(0 <= need[k] <= free[k] for k in watch[cell])
+
+    def options():
+        values = [True, False]
+        if randomize:
+            random.shuffle(values)
+        return values
+
+    # Explicit stack, as large frontiers would exceed the recursion limit
+    values = [None] * len(cells)
+    pending = [options()]
+    while pending:
+        depth = len(pending) - 1
+
+        # All values tried at this depth: undo the choice one level up
+        if not pending[-1]:
+            pending.pop()
+            if pending:
+                assign(cells[depth - 1], values[depth - 1], -1)
+            continue
+
+        if budget is not None:
+            if budget <= 0:
+                return
+            budget -= 1
+
+        value = pending[-1].pop()
+        cell = cells[depth]
+        assign(cell, value, 1)
+        if not consistent(cell):
+            assign(cell, value, -1)
+            continue
+        values[depth] = value
+
+        if depth + 1 == len(cells):
+            yield frozenset(c for c, v in zip(cells, values) if v)
+            assign(cell, value, -1)
+        else:
+            pending.append(options())
+
+
+def count_configurations(constraints, max_cells=20, max_solutions=20000,
+                         samples=100):
+    """
+    Counts the mine configurations of one component.
+
+    Returns (dist, cell_dist), where dist[k] is the number of solutions
+    with k mines, and cell_dist[cell][k] is the number of those in which
+    the cell is a mine. Components with more than `max_cells` cells, or
+    more than `max_solutions` solutions, are estimated from `samples`
+    random solutions instead.
+    """
+    cells = set().union(*[group for group, _ in constraints])
+    if len(cells) <= max_cells:
+        dist = {}
+        cell_dist = {cell: {} for cell in cells}
+        for found, mines in enumerate(solutions(constraints)):
+            if found >= max_solutions:
+                break
+            k = len(mines)
+            dist[k] = dist.get(k, 0) + 1
+            for cell in mines:
+                cell_dist[cell][k] = cell_dist[cell].get(k, 0) + 1
+        else:
+            return dist, cell_dist
+
+    # Too many configurations to enumerate: sample random ones, restarting
+    # any search that gets stuck after a few bad early choices
+    dist = {}
+    cell_dist = {cell: {} for cell in cells}
+    for _ in range(samples):
+        for _ in range(10):
+            mines = next(solutions(constraints, randomize=True,
+                                   budget=8 * len(cells)), None)
+            if mines is not None:
+                break
+        else:
+            continue
+        k = len(mines)
+        dist[k] = dist.get(k, 0) + 1
+        for cell in mines:
+            cell_dist[cell][k] = cell_dist[cell].get(k, 0) + 1
+    return dist, cell_dist
+
+
+def convolve(a, b):
+    """
+    Combines two mine-count distributions of independent components.
+    """
+    result = {}
+    for i, x in a.items():
+        for j, y in b.items():
+            result[i + j] = result.get(i + j, 0) + x * y
+    return result
+
+
+def mine_probabilities(constraints, unknown, mines_left=None, **options):
+    """
+    Returns the probability that each cell in `unknown` is a mine, given
+    constraints as (cells, count) pairs over those cells.
+
+    Configurations of each component are weighted by the number of ways
+    to place the remaining mines among unconstrained cells, if the
+    number of mines left is known. Returns None if the constraints
+    cannot all be satisfied.
+    """
+    components = split_components(constraints)
+    counted = [count_configurations(c, **options) for c in components]
+    frontier = set()
+    for _, cell_dist in counted:
+        frontier |= set(cell_dist)
+    outside = len(set(unknown) - frontier)
+
+    def weight(k):
+        """Ways to place the mines not in the frontier outside of it."""
+        if mines_left is None:
+            return 1
+        rest = mines_left - k
+        if rest < 0 or rest > outside:
+            return 0
+        return math.comb(outside, rest)
+
+    total = {0: 1}
+    for dist, _ in counted:
+        total = convolve(total, dist)
+    norm = sum(count * weight(k) for k, count in total.items())
+    if norm == 0:
+        return None
+
+    probabilities = {}
+    for index, (dist, cell_dist) in enumerate(counted):
+
+        # Distribution of mines in every other component
+        others = {0: 1}
+        for other, (other_dist, _) in enumerate(counted):
+            if other != index:
+                others = convolve(others, other_dist)
+
+        for cell, mine_dist in cell_dist.items():
+            mass = sum(
+                count * others_count * weight(k + j)
+                for k, count in mine_dist.items()
+                for j, others_count in others.items()
+            )
+            probabilities[cell] = mass / norm
+
+    # Unconstrained cells share the mines left outside the frontier
+    if outside:
+        if mines_left is None:
+            expected = sum(probabilities.values())
+            density = expected / len(frontier) if frontier else 0.5
+        else:
+            # Divide once at the end, as the counts can be too large for floats
+            density = sum(
+                count * weight(k) * (mines_left - k)
+                for k, count in total.items()
+            ) / (outside * norm)
+        for cell in unknown:
+            if cell not in frontier:
+                probabilities[cell] = density
+
+    return probabilities
+
+
+def propagate(constraints, watch, assignment):
+    """
+    Extends an assignment (a dict from cell to whether it is a mine) with
+    every value forced by a constraint that needs either all or none of
+    its unassigned cells to be mines. Returns False on a contradiction.
+    """
+    queue = list(range(len(constraints)))
+    while queue:
+        cells, count = constraints[queue.pop()]
+        unknown = [cell for cell in cells if cell not in assignment]
+        need = count - sum(1 for cell in cells if assignment.get(cell))
+        if need < 0 or need > len(unknown):
+            return False
+        if unknown and (need == 0 or need == len(unknown)):
+            for cell in unknown:
+                assignment[cell] = need > 0
+                queue.extend(watch[cell])
+    return True
+
+
+def find_solution(constraints, watch, assignment, deadline=None):
+    """
+    Returns a complete assignment extending `assignment` that satisfies
+    all constraints, or None if there is none, by backtracking with
+    constraint propagation. Raises TimeoutError once past the deadline.
+    """
+    stack = [dict(assignment)]
+    while stack:
+        if deadline is not None and time.perf_counter() > deadline:
+            raise TimeoutError("frontier search ran out of time")
+        current = stack.pop()
+        if not propagate(constraints, watch, current):
+            continue
+
+        # Branch on a cell of the first constraint not fully assigned
+        cell = next((cell for cell in watch if cell not in current), None)
+        if cell is None:
+            return current
+        for value in [True, False]:
+            branch = dict(current)
+            branch[cell] = value
+            stack.append(branch)
+    return None
+
+
+def forced_cells(constraints, budget=None):
+    """
+    Returns (safes, mines): the cells that are safe, or mines, in every
+    assignment that satisfies the constraints.
+
+    Each component is solved once, then every cell is checked by looking
+    for a solution where it takes the other value; any solution found
+    also rules out the cells whose values it flips. With a `budget` in
+    seconds, the search stops when time runs out, returning only the
+    cells proven so far.
+    """
+    deadline = None
+    if budget is not None:
+        deadline = time.perf_counter() + budget
+
+    safes = set()
+    mines = set()
+    try:
+        for component in split_components(constraints):
+
+            # Cells in constraint order, and the constraints of each cell
+            watch = {}
+            for k, (cells, _) in enumerate(component):
+                for cell in sorted(cells):
+                    watch.setdefault(cell, []).append(k)
+
+            solution = find_solution(component, watch, {}, deadline)
+            if solution is None:
+                continue
+            seen = {cell: {value} for cell, value in solution.items()}
+
+            for cell in watch:
+                if len(seen[cell]) == 2:
+                    continue
+                value = solution[cell]
+                other = find_solution(component, watch, {cell: not value},
+                                      deadline)
+                if other is None:
+                    (mines if value else safes).add(cell)
+                else:
+                    for c, v in other.items():
+                        seen[c].add(v)
+    except TimeoutError:
+        pass
+    return safes, mines
@@ -1,5 +1,9 @@
+from collections import deque
 import itertools
 import random
+import time
+
+from frontier import forced_cells, mine_probabilities
 
 
 class Minesweeper():
@@ -22,16 +26,16 @@ class Minesweeper():
                 row.append(False)
             self.board.append(row)
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Add mines randomly, sampling distinct cells so that dense boards
+        # don't keep retrying cells that already have a mine
+        for index in random.sample(range(height * width), mines):
+            i, j = divmod(index, width)
+            self.mines.add((i, j))
+            self.board[i][j] = True
 
-        # At first, player has found no mines
+        # At first, player has found no mines and revealed no cells
         self.mines_found = set()
+        self.revealed = set()
 
     def print(self):
         """
@@ -77,6 +81,44 @@ class Minesweeper():
 
         return count
 
+    def neighbor_cells(self, cell):
+        """
+        Returns the cells within one row and column of a given cell,
+        not including the cell itself.
+        """
+        return [
+            (i, j)
+            for i in range(max(cell[0] - 1, 0), min(cell[0] + 2, self.height))
+            for j in range(max(cell[1] - 1, 0), min(cell[1] + 2, self.width))
+            if (i, j) != cell
+        ]
+
+    def reveal(self, cell):
+        """
+        Reveals a safe cell and returns a list of (cell, count) pairs
+        for every cell revealed, where count is its number of nearby
+        mines. Revealing a cell with no nearby mines also reveals all
+        of its neighbors, flood-filling the whole region of zeros.
+        """
+        if cell in self.revealed:
+            return []
+        self.revealed.add(cell)
+
+        revealed = []
+        queue = deque([cell])
+        while queue:
+            current = queue.popleft()
+            count = self.nearby_mines(current)
+            revealed.append((current, count))
+
+            # No nearby mines, so every neighbor is safe to reveal too
+            if count == 0:
+                for neighbor in self.neighbor_cells(current):
+                    if neighbor not in self.revealed:
+                        self.revealed.add(neighbor)
+                        queue.append(neighbor)
+        return revealed
+
     def won(self):
         """
         Checks if all mines have been flagged.
@@ -84,6 +126,71 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+class LargeMinesweeper(Minesweeper):
+    """
+    Minesweeper game representation for very large boards: the board
+    is a NumPy array, and the number of nearby mines of every cell is
+    computed once, when the game is created.
+    """
+
+    def __init__(self, height=8, width=8, mines=8):
+        import numpy as np
+
+        self.height = height
+        self.width = width
+
+        # Add mines randomly, sampling distinct cells
+        indices = random.sample(range(height * width), mines)
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[indices] = True
+        self.mines = set(divmod(index, width) for index in indices)
+
+        # Count nearby mines for all cells at once, by adding up the board
+        # shifted in each of the 8 directions
+        padded = np.pad(self.board.astype(np.int8), 1)
+        self.counts = np.zeros((height, width), dtype=np.int8)
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                if (di, dj) != (0, 0):
+                    self.counts += padded[1 + di:1 + di + height,
+                                          1 + dj:1 + dj + width]
+
+        # Neighbors of each cell index, computed when first needed
+        self.neighbor_cache = {}
+
+        # At first, player has found no mines and revealed no cells
+        self.mines_found = set()
+        self.revealed = set()
+
+    def is_mine(self, cell):
+        return bool(self.board[cell])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the precomputed number of mines next to a given cell.
+        """
+        return int(self.counts[cell])
+
+    def neighbors(self, index):
+        """
+        Returns the indices (i * width + j) of the cells next to
+        the cell with a given index.
+        """
+        if index not in self.neighbor_cache:
+            i, j = divmod(index, self.width)
+            self.neighbor_cache[index] = [
+                x * self.width + y
+                for x in range(max(i - 1, 0), min(i + 2, self.height))
+                for y in range(max(j - 1, 0), min(j + 2, self.width))
+                if (x, y) != (i, j)
+            ]
+        return self.neighbor_cache[index]
+
+    def neighbor_cells(self, cell):
+        return [divmod(index, self.width)
+                for index in self.neighbors(cell[0] * self.width + cell[1])]
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
@@ -98,6 +205,11 @@ class Sentence():
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        # Hashes by content, so a sentence must be taken out of any set
+        # or dict before it is changed by mark_mine or mark_safe
+        return hash((frozenset(self.cells), self.count))
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -146,17 +258,172 @@ class Sentence():
             self.cells.remove(cell)
         return
 
+    def keys(self):
+        """
+        Returns the keys the AI indexes this sentence under: its cells.
+        """
+        return self.cells
+
+    def compare(self, other):
+        """
+        Returns -1 if self.cells is a strict subset of other.cells,
+        1 if it is a strict superset, and 0 otherwise.
+        """
+        if self.cells < other.cells:
+            return -1
+        if self.cells > other.cells:
+            return 1
+        return 0
+
+    def subtract(self, other):
+        """
+        Returns the sentence left after removing the cells (and mines)
+        of a sentence whose cells are a subset of self.cells.
+        """
+        return Sentence(self.cells - other.cells, self.count - other.count)
+
+
+class BitSentence():
+    """
+    Logical statement about a Minesweeper game, stored compactly:
+    the cells are the set bits of an integer mask, where cell (i, j)
+    is bit i * width + j, and subset tests, differences and marking
+    cells are single integer operations.
+    """
+
+    # The positions of the set bits are kept alongside the mask, so the
+    # AI can index a sentence without scanning its mask, and so is the
+    # hash, as sets hash sentences often
+    __slots__ = ("mask", "count", "width", "positions", "hashed")
+
+    def __init__(self, cells, count, width):
+        self.width = width
+        self.count = count
+        self.positions = [i * width + j for i, j in cells]
+        mask = 0
+        for position in self.positions:
+            mask |= 1 << position
+        self.mask = mask
+        self.hashed = hash((mask, count))
+
+    @classmethod
+    def from_positions(cls, positions, mask, count, width):
+        """
+        Returns a sentence whose set bits, `positions`, are already known.
+        """
+        sentence = cls.__new__(cls)
+        sentence.width = width
+        sentence.count = count
+        sentence.positions = positions
+        sentence.mask = mask
+        sentence.hashed = hash((mask, count))
+        return sentence
+
+    @property
+    def cells(self):
+        """
+        Returns the set of cells whose bits are set in the mask.
+        """
+        width = self.width
+        return {divmod(position, width) for position in self.positions}
+
+    def keys(self):
+        """
+        Returns the keys the AI indexes this sentence under: the
+        positions of its set bits.
+        """
+        return self.positions
+
+    def __eq__(self, other):
+        return self.mask == other.mask and self.count == other.count
+
+    def __hash__(self):
+        return self.hashed
+
+    def __str__(self):
+        return f"{self.cells} = {self.count}"
+
+    def known_mines(self):
+        """
+        Returns the set of all cells in the sentence known to be mines.
+        """
+        if len(self.positions) == self.count:
+            return self.cells
+        return set()
+
+    def known_safes(self):
+        """
+        Returns the set of all cells in the sentence known to be safe.
+        """
+        if self.count == 0:
+            return self.cells
+        return set()
+
+    def mark_mine(self, cell):
+        """
+        Updates the sentence given that a cell is known to be a mine.
+        """
+        position = cell[0] * self.width + cell[1]
+        if position in self.positions:
+            self.positions.remove(position)
+            self.mask ^= 1 << position
+            self.count -= 1
+            self.hashed = hash((self.mask, self.count))
+
+    def mark_safe(self, cell):
+        """
+        Updates the sentence given that a cell is known to be safe.
+        """
+        position = cell[0] * self.width + cell[1]
+        if position in self.positions:
+            self.positions.remove(position)
+            self.mask ^= 1 << position
+            self.hashed = hash((self.mask, self.count))
+
+    def compare(self, other):
+        """
+        Returns -1 if the cells are a strict subset of other's cells,
+        1 if they are a strict superset, and 0 otherwise.
+        """
+        union = self.mask | other.mask
+        if union == other.mask != self.mask:
+            return -1
+        if union == self.mask != other.mask:
+            return 1
+        return 0
+
+    def subtract(self, other):
+        """
+        Returns the sentence left after removing the cells (and mines)
+        of a sentence whose cells are a subset of this one's.
+        """
+        return BitSentence.from_positions(
+            [p for p in self.positions if p not in other.positions],
+            self.mask & ~other.mask, self.count - other.count, self.width
+        )
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, bitset=False, mines=None,
+                 csp_budget=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known, used to weigh guesses
+        self.total_mines = mines
+
+        # Whether sentences are stored as bitmasks rather than sets of cells
+        self.bitset = bitset
+
+        # Seconds per move for exact frontier solving, or None to skip it
+        self.csp_budget = csp_budget
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -164,8 +431,35 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Neighbors of each cell, by cell index, computed when first needed
+        self.neighbor_cache = dict()
+
+        # For bitmask sentences: masks of the cells known to be mines, and
+        # of those known to be mines or safe, and the neighbor offsets and
+        # mask for each combination of board edges a cell can touch
+        self.mine_mask = 0
+        self.known_mask = 0
+        self.stencils = dict()
+
+        # Sentences about the game known to be true, without duplicates
+        self.knowledge = set()
+
+        # Map from each cell (or bit position, for bitmask sentences) to
+        # the sentences that include it, as a dict by id, so a sentence can
+        # change without being moved out of the entries of its other cells
+        self.cell_index = dict()
+
+        # Sentences added or changed since inference last looked at them
+        self.worklist = deque()
+
+        # Counters for the size of the knowledge base and what shrinks it
+        self.stats = {
+            "sentences": 0,
+            "peak": 0,
+            "inferred": 0,
+            "solved": 0,
+            "compacted": 0,
+        }
 
     def mark_mine(self, cell):
         """
@@ -173,8 +467,7 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.mark_cell(cell, True)
 
     def mark_safe(self, cell):
         """
@@ -182,8 +475,105 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self.mark_cell(cell, False)
+
+    def mark_cell(self, cell, mine):
+        """
+        Removes a cell from every sentence that includes it, and queues
+        the changed sentences for inference. Sentences that become empty,
+        or equal to one already known, are dropped.
+        """
+        key = self.cell_key(cell)
+        if self.bitset:
+            self.known_mask |= 1 << key
+            if mine:
+                self.mine_mask |= 1 << key
+        sentences = self.cell_index.pop(key, None)
+        if not sentences:
+            return
+        for sentence in sentences.values():
+            self.knowledge.discard(sentence)
+            if mine:
+                sentence.mark_mine(cell)
+            else:
+                sentence.mark_safe(cell)
+            if not sentence.keys() or sentence in self.knowledge:
+                self.unindex(sentence)
+            else:
+                self.knowledge.add(sentence)
+                self.worklist.append(sentence)
+        self.stats["sentences"] = len(self.knowledge)
+
+    def cell_key(self, cell):
+        """
+        Returns the key of a cell in the cell index.
+        """
+        if self.bitset:
+            return cell[0] * self.width + cell[1]
+        return cell
+
+    def neighbor_bits(self, cell):
+        """
+        Returns the bit positions and the mask of the neighbors of a cell,
+        by shifting the neighbor mask of a cell touching the same edges.
+        """
+        i, j = cell
+        width = self.width
+        edges = (i > 0, i < self.height - 1, j > 0, j < width - 1)
+        if edges not in self.stencils:
+            up, down, left, right = edges
+            offsets = [
+                di * width + dj
+                for di in range(-1 if up else 0, 2 if down else 1)
+                for dj in range(-1 if left else 0, 2 if right else 1)
+                if di or dj
+            ]
+            stencil = 0
+            for offset in offsets:
+                stencil |= 1 << (offset + width + 1)
+            self.stencils[edges] = (offsets, stencil)
+        offsets, stencil = self.stencils[edges]
+
+        # The stencil is centered on bit width + 1
+        index = i * width + j
+        shift = index - width - 1
+        mask = stencil << shift if shift >= 0 else stencil >> -shift
+        return [index + offset for offset in offsets], mask
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and queues it for inference,
+        unless it is empty or already known.
+        """
+        keys = sentence.keys()
+        if not keys or sentence in self.knowledge:
+            return False
+        self.knowledge.add(sentence)
+        for key in keys:
+            self.cell_index.setdefault(key, {})[id(sentence)] = sentence
+        self.worklist.append(sentence)
+        self.stats["sentences"] = len(self.knowledge)
+        self.stats["peak"] = max(self.stats["peak"], len(self.knowledge))
+        return True
+
+    def remove_sentence(self, sentence):
+        """
+        Removes a sentence from the knowledge base and the cell index.
+        """
+        self.knowledge.discard(sentence)
+        self.stats["sentences"] = len(self.knowledge)
+        self.unindex(sentence)
+
+    def unindex(self, sentence):
+        """
+        Removes a sentence from the cell index.
+        """
+        for key in sentence.keys():
+            sentences = self.cell_index.get(key)
+            if sentences is not None:
+                sentences.pop(id(sentence), None)
+                if not sentences:
+                    del self.cell_index[key]
 
     def add_knowledge(self, cell, count):
         """
@@ -200,38 +590,81 @@ class MinesweeperAI():
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
+        self.observe(cell, count)
+
+        # Mark additional cells as safe or mines, and add any new sentences that can be inferred, until nothing changes.
+        self.inference()
+        self.deduce()
+
+    def add_knowledge_batch(self, reveals):
+        """
+        Adds knowledge for a batch of revealed (cell, count) pairs, such
+        as those returned by Minesweeper.reveal, and then runs inference
+        once for the whole batch.
+        """
+        # Mark the whole batch safe first, so no new sentence includes
+        # a cell that the same batch is about to reveal
+        for cell, _ in reveals:
+            self.moves_made.add(cell)
+            self.mark_safe(cell)
+        for cell, count in reveals:
+            self.observe(cell, count)
+        self.inference()
+        self.deduce()
+
+    def observe(self, cell, count):
+        """
+        Records that a safe cell was revealed with `count` nearby mines,
+        without running inference yet.
+        """
         # Mark the cell as one of the moves made in the game.
         self.moves_made.add(cell)
         # Mark the cell as a safe cell.
         self.mark_safe(cell)
         # Add a new sentence to the AI’s knowledge base based on the value of cell and count, to indicate that count of the cell’s neighbors are mines.
-        # Get neighbors of the cell
-        neighbors = self.get_neighbors(cell)
-        new_sentence = Sentence(neighbors, count)
-        # Mark additional cells as safe or mines.
-        for mine in self.mines:
-            new_sentence.mark_mine(mine)
-        for safe in self.safes:
-            new_sentence.mark_safe(safe)
-
-        self.knowledge.append(new_sentence)
-        
-        mines = set()
-        safes = set()
-        for sentence in self.knowledge:
-            for mine in sentence.known_mines():
-                mines.add(mine)
-            for safe in sentence.known_safes():
-                safes.add(safe)
-        
-        for mine in mines:
-            self.mark_mine(mine)
-        for safe in safes:
-            self.mark_safe(safe)
-        # Add any new sentences to the AI's knowledge base if they can be inferred from existing knowledge
-        self.remove_empty()
-        self.inference()
+        # Get neighbors of the cell, leaving out cells already known to be safe or mines.
+        if self.bitset:
+            positions, mask = self.neighbor_bits(cell)
+            count -= bin(mask & self.mine_mask).count("1")
+            known = mask & self.known_mask
+            if known:
+                mask ^= known
+                positions = [p for p in positions if not known >> p & 1]
+            new_sentence = BitSentence.from_positions(positions, mask, count,
+                                                      self.width)
+        else:
+            neighbors = self.get_neighbors(cell)
+            new_sentence = Sentence(neighbors - self.mines - self.safes,
+                                    count - len(neighbors & self.mines))
+        self.add_sentence(new_sentence)
 
+    def deduce(self):
+        """
+        If no safe move is known, solves the frontier exactly as a
+        constraint satisfaction problem, marking every cell that is safe
+        or a mine in all consistent assignments, within `csp_budget`
+        seconds for the whole move. This finds deductions, such as 1-2-1
+        patterns, that need several overlapping sentences at once.
+        """
+        if self.csp_budget is None:
+            return
+        deadline = time.perf_counter() + self.csp_budget
+        while not self.safes - self.moves_made and self.knowledge:
+
+            # Every pass only gets the time left of the move's budget
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            constraints = [(sentence.cells, sentence.count)
+                           for sentence in self.knowledge]
+            safes, mines = forced_cells(constraints, remaining)
+            if not safes and not mines:
+                return
+            for mine in mines:
+                self.mark_mine(mine)
+            for safe in safes:
+                self.mark_safe(safe)
+            self.inference()
 
     def make_safe_move(self):
         """
@@ -252,12 +685,16 @@ class MinesweeperAI():
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Should choose among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        picking the cell least likely to be a mine.
         """
         # This function will be called if a safe move is not possible
-        # if the AI doesn’t know where to move, it will choose to move randomly instead.
+        # if the AI doesn’t know where to move, it will guess the cell with the lowest risk instead.
+        move = self.best_guess()
+        if move is not None:
+            return move
         for i in range(0, self.height):
             for j in range(0, self.width):
                 # The move must not be a move that has already been made and that is known to be a mine.
@@ -266,32 +703,99 @@ class MinesweeperAI():
         # If no such moves are possible, the function should return None.
         return None
 
+    def best_guess(self):
+        """
+        Returns the unknown cell with the lowest probability of being
+        a mine, counting the mine configurations consistent with the
+        knowledge base, or None if there is no unknown cell.
+        """
+        unknown = set()
+        for i in range(self.height):
+            for j in range(self.width):
+                cell = (i, j)
+                if (cell not in self.mines and cell not in self.safes
+                        and cell not in self.moves_made):
+                    unknown.add(cell)
+        if not unknown:
+            return None
+
+        constraints = [(sentence.cells, sentence.count)
+                       for sentence in self.knowledge]
+        mines_left = None
+        if self.total_mines is not None:
+            mines_left = self.total_mines - len(self.mines)
+        probabilities = mine_probabilities(constraints, unknown, mines_left)
+        if probabilities is None:
+            return None
+        return min(unknown, key=lambda cell: (probabilities[cell], cell))
+
     def get_neighbors(self, cell):
-        neighbors = set()
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-                if (i,j) != cell:
-                    if 0 <= i < self.height and 0 <= j < self.width:
-                        neighbors.add((i,j))
-        return neighbors
-    
-    def remove_empty(self):
-        removed = []
-        for sentence in self.knowledge:
-            if sentence.cells == set():
-                removed.append(sentence)
-        for sentence in removed:
-            self.knowledge.remove(sentence)
+        """
+        Returns the cells next to a given cell, caching them by cell index.
+        """
+        index = cell[0] * self.width + cell[1]
+        if index not in self.neighbor_cache:
+            neighbors = set()
+            for i in range(cell[0] - 1, cell[0] + 2):
+                for j in range(cell[1] - 1, cell[1] + 2):
+                    if (i,j) != cell:
+                        if 0 <= i < self.height and 0 <= j < self.width:
+                            neighbors.add((i,j))
+            self.neighbor_cache[index] = frozenset(neighbors)
+        return self.neighbor_cache[index]
 
     def inference(self):
-        for s1 in self.knowledge:
-            for s2 in self.knowledge:
-                if s1.cells == s2.cells:
-                    continue
-                if s1.cells.issubset(s2.cells):
-                    new_cells = s2.cells - s1.cells
-                    new_count = s2.count - s1.count
-                    new_sentence = Sentence(new_cells, new_count)
-                    if new_sentence not in self.knowledge:
-                        self.knowledge.append(new_sentence)
-        
\ No newline at end of file
+        """
+        Propagates knowledge until nothing changes: marks the cells of
+        any sentence that are known to be safe or mines, and adds every
+        sentence that can be inferred by subtracting a sentence from
+        another sentence whose cells are a superset of its own.
+
+        Only sentences in the worklist are looked at, and only compared
+        against the sentences sharing a cell with them. Marking a cell
+        puts every sentence it changes back on the worklist.
+
+        The knowledge base is compacted along the way: solved sentences
+        are dropped once their cells are marked, and a superset is dropped
+        once the sentence inferred from it is known, since the subset and
+        the inferred sentence together imply it.
+        """
+        while self.worklist:
+            sentence = self.worklist.popleft()
+
+            # Skip sentences dropped since they were queued
+            if sentence not in self.knowledge:
+                continue
+
+            # Resolve a sentence whose cells are all mines or all safe
+            mines = sentence.known_mines()
+            if mines:
+                self.stats["solved"] += 1
+                for mine in list(mines):
+                    self.mark_mine(mine)
+                continue
+            safes = sentence.known_safes()
+            if safes:
+                self.stats["solved"] += 1
+                for safe in list(safes):
+                    self.mark_safe(safe)
+                continue
+
+            # Any subset or superset must share at least one cell
+            others = {}
+            for key in sentence.keys():
+                others.update(self.cell_index[key])
+
+            inferred = []
+            for other in others.values():
+                relation = sentence.compare(other)
+                if relation < 0:
+                    inferred.append((other, other.subtract(sentence)))
+                elif relation > 0:
+                    inferred.append((sentence, sentence.subtract(other)))
+            for superset, new_sentence in inferred:
+                if self.add_sentence(new_sentence):
+                    self.stats["inferred"] += 1
+                if superset in self.knowledge:
+                    self.remove_sentence(superset)
+                    self.stats["compacted"] += 1
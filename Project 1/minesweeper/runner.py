@@ -1,6 +1,5 @@
 import pygame
 import sys
-import time
 
 from minesweeper import Minesweeper, MinesweeperAI
 
@@ -8,28 +7,60 @@ HEIGHT = 8
 WIDTH = 8
 MINES = 8
 
+# Largest board drawn, in pixels per side; bigger boards get smaller cells
+MAX_BOARD_SIZE = 720
+
+# Board size can be given on the command line
+USAGE = "Usage: python runner.py [height width mines]"
+if len(sys.argv) not in [1, 4]:
+    sys.exit(USAGE)
+if len(sys.argv) == 4:
+    try:
+        HEIGHT, WIDTH, MINES = (int(arg) for arg in sys.argv[1:])
+    except ValueError:
+        sys.exit(USAGE)
+    if HEIGHT <= 0 or WIDTH <= 0:
+        sys.exit(f"{USAGE}\nheight and width must be positive")
+    if not 0 <= MINES <= HEIGHT * WIDTH:
+        sys.exit(f"{USAGE}\nmines must be between 0 and height * width")
+    if max(HEIGHT, WIDTH) > MAX_BOARD_SIZE:
+        sys.exit(f"{USAGE}\nat most {MAX_BOARD_SIZE} rows and columns "
+                 "can be drawn; use simulate.py for larger boards")
+
+# Frames per second while something changes, and while idle
+FPS = 60
+IDLE_FPS = 10
+
 # Colors
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
 WHITE = (255, 255, 255)
 
+# Compute board size, growing the window if cells would be too small,
+# but only up to MAX_BOARD_SIZE: past that, cells shrink instead
+BOARD_PADDING = 20
+MIN_CELL_SIZE = 12
+cell_size = int(min((400 - BOARD_PADDING * 2) / WIDTH,
+                    (400 - BOARD_PADDING * 2) / HEIGHT))
+cell_size = max(cell_size, MIN_CELL_SIZE)
+cell_size = max(1, min(cell_size, MAX_BOARD_SIZE // max(HEIGHT, WIDTH)))
+board_origin = (BOARD_PADDING, BOARD_PADDING)
+
 # Create game
 pygame.init()
-size = width, height = 600, 400
+size = width, height = (
+    max(600, int((3 / 2) * (WIDTH * cell_size + BOARD_PADDING * 2))),
+    max(400, HEIGHT * cell_size + BOARD_PADDING * 2)
+)
 screen = pygame.display.set_mode(size)
+clock = pygame.time.Clock()
 
 # Fonts
 OPEN_SANS = "assets/fonts/OpenSans-Regular.ttf"
 smallFont = pygame.font.Font(OPEN_SANS, 20)
 mediumFont = pygame.font.Font(OPEN_SANS, 28)
 largeFont = pygame.font.Font(OPEN_SANS, 40)
-
-# Compute board size
-BOARD_PADDING = 20
-board_width = ((2 / 3) * width) - (BOARD_PADDING * 2)
-board_height = height - (BOARD_PADDING * 2)
-cell_size = int(min(board_width / WIDTH, board_height / HEIGHT))
-board_origin = (BOARD_PADDING, BOARD_PADDING)
+cellFont = pygame.font.Font(OPEN_SANS, min(20, max(8, int(cell_size * 0.6))))
 
 # Add images
 flag = pygame.image.load("assets/images/flag.png")
@@ -37,186 +68,243 @@ flag = pygame.transform.scale(flag, (cell_size, cell_size))
 mine = pygame.image.load("assets/images/mine.png")
 mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
-# Create game and AI agent
-game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+# Buttons
+buttonRect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
+aiButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+resetButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+statusRect = pygame.Rect(
+    (2 / 3) * width, (2 / 3) * height - 25, width / 3, 50
+)
+
+
+def cell_rect(cell):
+    """
+    Returns the rectangle a cell is drawn in.
+    """
+    i, j = cell
+    return pygame.Rect(
+        board_origin[0] + j * cell_size,
+        board_origin[1] + i * cell_size,
+        cell_size, cell_size
+    )
+
+
+def cell_at(position):
+    """
+    Returns the cell under a screen position, or None if off the board.
+    """
+    j = (position[0] - board_origin[0]) // cell_size
+    i = (position[1] - board_origin[1]) // cell_size
+    if 0 <= i < HEIGHT and 0 <= j < WIDTH:
+        return (i, j)
+    return None
+
+
+def draw_cell(cell):
+    """
+    Draws one cell, with a mine, flag, or number if needed.
+    """
+    rect = cell_rect(cell)
+    pygame.draw.rect(screen, GRAY, rect)
+
+    # Borders and numbers would cover tiny cells, so revealed cells are
+    # only shown as white ones
+    if cell_size >= 4:
+        pygame.draw.rect(screen, WHITE, rect, max(1, min(3, cell_size // 10)))
+    if lost and game.is_mine(cell):
+        screen.blit(mine, rect)
+    elif cell in flags:
+        screen.blit(flag, rect)
+    elif cell in revealed and cell_size < 8:
+        pygame.draw.rect(screen, WHITE, rect)
+    elif cell in revealed:
+        neighbors = cellFont.render(str(revealed[cell]), True, BLACK)
+        neighborsTextRect = neighbors.get_rect()
+        neighborsTextRect.center = rect.center
+        screen.blit(neighbors, neighborsTextRect)
+    return rect
+
+
+def draw_button(rect, label):
+    buttonText = mediumFont.render(label, True, BLACK)
+    buttonTextRect = buttonText.get_rect()
+    buttonTextRect.center = rect.center
+    pygame.draw.rect(screen, WHITE, rect)
+    screen.blit(buttonText, buttonTextRect)
+
+
+def draw_status():
+    """
+    Draws the Lost / Won text.
+    """
+    pygame.draw.rect(screen, BLACK, statusRect)
+    text = "Lost" if lost else "Won" if game.mines == flags else ""
+    text = mediumFont.render(text, True, WHITE)
+    textRect = text.get_rect()
+    textRect.center = statusRect.center
+    screen.blit(text, textRect)
+    return statusRect
+
+
+def draw_instructions():
+    screen.fill(BLACK)
+
+    # Title
+    title = largeFont.render("Play Minesweeper", True, WHITE)
+    titleRect = title.get_rect()
+    titleRect.center = ((width / 2), 50)
+    screen.blit(title, titleRect)
+
+    # Rules
+    rules = [
+        "Click a cell to reveal it.",
+        "Right-click a cell to mark it as a mine.",
+        "Mark all mines successfully to win!"
+    ]
+    for i, rule in enumerate(rules):
+        line = smallFont.render(rule, True, WHITE)
+        lineRect = line.get_rect()
+        lineRect.center = ((width / 2), 150 + 30 * i)
+        screen.blit(line, lineRect)
+
+    # Play game button
+    draw_button(buttonRect, "Play Game")
+
+
+def draw_board():
+    screen.fill(BLACK)
+    for i in range(HEIGHT):
+        for j in range(WIDTH):
+            draw_cell((i, j))
+    draw_button(aiButton, "AI Move")
+    draw_button(resetButton, "Reset")
+    draw_status()
+
+
+def new_game():
+    global game, ai, revealed, flags, lost
+    game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
+    ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
+
+    # Keep track of revealed cells (and their counts), flagged cells,
+    # and if a mine was hit
+    revealed = dict()
+    flags = set()
+    lost = False
+
 
-# Keep track of revealed cells, flagged cells, and if a mine was hit
-revealed = set()
-flags = set()
-lost = False
+# Create game and AI agent
+new_game()
 
 # Show instructions initially
 instructions = True
 
+# Redraw everything on the next frame, or only the cells that changed
+full_redraw = True
+dirty = set()
+
 while True:
 
-    # Check if game quit
+    move = None
+    left = right = False
+
+    # Check if game quit, and collect clicks
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             sys.exit()
-
-    screen.fill(BLACK)
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:
+                left = event.pos
+            elif event.button == 3:
+                right = event.pos
 
     # Show game instructions
     if instructions:
-
-        # Title
-        title = largeFont.render("Play Minesweeper", True, WHITE)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
-
-        # Rules
-        rules = [
-            "Click a cell to reveal it.",
-            "Right-click a cell to mark it as a mine.",
-            "Mark all mines successfully to win!"
-        ]
-        for i, rule in enumerate(rules):
-            line = smallFont.render(rule, True, WHITE)
-            lineRect = line.get_rect()
-            lineRect.center = ((width / 2), 150 + 30 * i)
-            screen.blit(line, lineRect)
-
-        # Play game button
-        buttonRect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
-        buttonText = mediumFont.render("Play Game", True, BLACK)
-        buttonTextRect = buttonText.get_rect()
-        buttonTextRect.center = buttonRect.center
-        pygame.draw.rect(screen, WHITE, buttonRect)
-        screen.blit(buttonText, buttonTextRect)
+        if full_redraw:
+            draw_instructions()
+            pygame.display.flip()
+            full_redraw = False
 
         # Check if play button clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if buttonRect.collidepoint(mouse):
-                instructions = False
-                time.sleep(0.3)
-
-        pygame.display.flip()
+        if left and buttonRect.collidepoint(left):
+            instructions = False
+            full_redraw = True
+        clock.tick(FPS if left else IDLE_FPS)
         continue
 
-    # Draw board
-    cells = []
-    for i in range(HEIGHT):
-        row = []
-        for j in range(WIDTH):
-
-            # Draw rectangle for cell
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size, cell_size
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            # Add a mine, flag, or number if needed
-            if game.is_mine((i, j)) and lost:
-                screen.blit(mine, rect)
-            elif (i, j) in flags:
-                screen.blit(flag, rect)
-            elif (i, j) in revealed:
-                neighbors = smallFont.render(
-                    str(game.nearby_mines((i, j))),
-                    True, BLACK
-                )
-                neighborsTextRect = neighbors.get_rect()
-                neighborsTextRect.center = rect.center
-                screen.blit(neighbors, neighborsTextRect)
-
-            row.append(rect)
-        cells.append(row)
-
-    # AI Move button
-    aiButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = aiButton.center
-    pygame.draw.rect(screen, WHITE, aiButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Reset button
-    resetButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("Reset", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = resetButton.center
-    pygame.draw.rect(screen, WHITE, resetButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
-    text = mediumFont.render(text, True, WHITE)
-    textRect = text.get_rect()
-    textRect.center = ((5 / 6) * width, (2 / 3) * height)
-    screen.blit(text, textRect)
-
-    move = None
-
-    left, _, right = pygame.mouse.get_pressed()
+    status = (lost, game.mines == flags)
 
     # Check for a right-click to toggle flagging
-    if right == 1 and not lost:
-        mouse = pygame.mouse.get_pos()
-        for i in range(HEIGHT):
-            for j in range(WIDTH):
-                if cells[i][j].collidepoint(mouse) and (i, j) not in revealed:
-                    if (i, j) in flags:
-                        flags.remove((i, j))
-                    else:
-                        flags.add((i, j))
-                    time.sleep(0.2)
-
-    elif left == 1:
-        mouse = pygame.mouse.get_pos()
+    if right and not lost:
+        cell = cell_at(right)
+        if cell is not None and cell not in revealed:
+            if cell in flags:
+                flags.remove(cell)
+            else:
+                flags.add(cell)
+            dirty.add(cell)
+
+    elif left:
 
         # If AI button clicked, make an AI move
-        if aiButton.collidepoint(mouse) and not lost:
+        if aiButton.collidepoint(left) and not lost:
             move = ai.make_safe_move()
             if move is None:
                 move = ai.make_random_move()
                 if move is None:
+                    dirty |= flags ^ ai.mines
                     flags = ai.mines.copy()
                     print("No moves left to make.")
                 else:
-                    print("No known safe moves, AI making random move.")
+                    print("No known safe moves, AI making best guess.")
             else:
                 print("AI making safe move.")
-            time.sleep(0.2)
 
         # Reset game state
-        elif resetButton.collidepoint(mouse):
-            game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
-            revealed = set()
-            flags = set()
-            lost = False
-            continue
+        elif resetButton.collidepoint(left):
+            new_game()
+            full_redraw = True
 
         # User-made move
         elif not lost:
-            for i in range(HEIGHT):
-                for j in range(WIDTH):
-                    if (cells[i][j].collidepoint(mouse)
-                            and (i, j) not in flags
-                            and (i, j) not in revealed):
-                        move = (i, j)
+            cell = cell_at(left)
+            if (cell is not None
+                    and cell not in flags
+                    and cell not in revealed):
+                move = cell
 
     # Make move and update AI knowledge
     if move:
         if game.is_mine(move):
             lost = True
+            dirty |= game.mines
         else:
-            nearby = game.nearby_mines(move)
-            revealed.add(move)
-            ai.add_knowledge(move, nearby)
-
-    pygame.display.flip()
+            # Reveal the cell, and the whole region around it if it has no nearby mines
+            reveals = game.reveal(move)
+            for cell, nearby in reveals:
+                revealed[cell] = nearby
+                if cell in flags:
+                    flags.discard(cell)
+                dirty.add(cell)
+            ai.add_knowledge_batch(reveals)
+
+    # Redraw only what changed since the last frame
+    if full_redraw:
+        draw_board()
+        pygame.display.flip()
+        full_redraw = False
+        dirty = set()
+    elif dirty or status != (lost, game.mines == flags):
+        rects = [draw_cell(cell) for cell in dirty]
+        rects.append(draw_status())
+        pygame.display.update(rects)
+        dirty = set()
+
+    # Cap the frame rate, and sleep longer while nothing is happening
+    clock.tick(FPS if (left or right) else IDLE_FPS)
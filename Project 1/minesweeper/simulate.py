@@ -0,0 +1,155 @@
+import argparse
+import multiprocessing
+import random
+import time
+
+from minesweeper import LargeMinesweeper, Minesweeper, MinesweeperAI
+
+
+def play_game(task):
+    """
+    Plays one seeded game without a display and returns its statistics.
+    """
+    height, width, mines, seed, bitset, large, csp_budget = task
+
+    # Seeding once makes both the board and the AI's guesses reproducible
+    random.seed(seed)
+    engine = LargeMinesweeper if large else Minesweeper
+    game = engine(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, bitset=bitset, mines=mines,
+                       csp_budget=csp_budget)
+
+    stats = {
+        "won": False,
+        "moves": 0,
+        "guesses": 0,
+        "inference_time": 0.0,
+        "max_knowledge": 0,
+    }
+    while len(ai.moves_made) < height * width - mines:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            stats["guesses"] += 1
+            if move is None:
+                break
+        if game.is_mine(move):
+            return stats
+
+        # Reveal the whole zero region at once and learn it in one batch
+        start = time.perf_counter()
+        ai.add_knowledge_batch(game.reveal(move))
+        stats["inference_time"] += time.perf_counter() - start
+        stats["moves"] += 1
+        stats["max_knowledge"] = max(stats["max_knowledge"], len(ai.knowledge))
+
+    stats["won"] = len(ai.moves_made) == height * width - mines
+    return stats
+
+
+def simulate(height, width, mines, games, seed=0, processes=1, bitset=False,
+             large=False, csp_budget=None):
+    """
+    Plays `games` seeded games on one board configuration, in a process
+    pool if `processes` is more than 1, and returns summary statistics.
+    """
+    tasks = [(height, width, mines, seed + n, bitset, large, csp_budget)
+             for n in range(games)]
+    start = time.perf_counter()
+    if processes > 1:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(play_game, tasks,
+                               chunksize=max(1, games // (4 * processes)))
+    else:
+        results = [play_game(task) for task in tasks]
+    elapsed = time.perf_counter() - start
+
+    moves = sum(result["moves"] for result in results)
+    return {
+        "games": games,
+        "games_per_second": games / elapsed if elapsed else float("inf"),
+        "win_rate": sum(result["won"] for result in results) / games,
+        "guesses_per_game": sum(r["guesses"] for r in results) / games,
+        "inference_per_move": (
+            sum(result["inference_time"] for result in results) / moves
+            if moves else 0.0
+        ),
+        "max_knowledge": max(result["max_knowledge"] for result in results),
+    }
+
+
+def parse_board(text):
+    """
+    Parses a board given as HEIGHTxWIDTH or HEIGHTxWIDTHxMINES, as
+    (height, width, mines), with mines None if not given.
+    """
+    try:
+        parts = [int(part) for part in text.lower().split("x")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid board {text}")
+    if len(parts) not in [2, 3]:
+        raise argparse.ArgumentTypeError(f"invalid board {text}")
+    height, width, mines = parts if len(parts) == 3 else parts + [None]
+    if height <= 0 or width <= 0:
+        raise argparse.ArgumentTypeError(
+            f"invalid board {text}: height and width must be positive"
+        )
+    if mines is not None and not 0 <= mines <= height * width:
+        raise argparse.ArgumentTypeError(
+            f"invalid board {text}: mines must be between 0 and "
+            "height * width"
+        )
+    return height, width, mines
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Minesweeper games headless and report AI statistics."
+    )
+    parser.add_argument("boards", nargs="*", type=parse_board,
+                        default=[(8, 8, 8)],
+                        help="boards as HEIGHTxWIDTH or HEIGHTxWIDTHxMINES")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--density", type=float, nargs="+", default=[0.15],
+                        help="mine densities for boards given without mines")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int,
+                        default=multiprocessing.cpu_count())
+    parser.add_argument("--bitset", action="store_true",
+                        help="store sentences as bitmasks")
+    parser.add_argument("--large", action="store_true",
+                        help="use the NumPy board with precomputed counts")
+    parser.add_argument("--csp", type=float, default=None, metavar="SECONDS",
+                        help="solve the frontier exactly, with this budget")
+    args = parser.parse_args()
+
+    configs = []
+    for height, width, mines in args.boards:
+        for density in args.density:
+            if mines is None:
+                if not 0 <= density <= 1:
+                    parser.error(f"invalid density {density}: must be "
+                                 "between 0 and 1")
+                config = (height, width,
+                          max(1, round(height * width * density)))
+            else:
+                config = (height, width, mines)
+            if config not in configs:
+                configs.append(config)
+
+    print(f"{'board':>12} {'mines':>6} {'games/s':>9} {'win rate':>9} "
+          f"{'guesses':>8} {'ms/move':>8} {'max KB':>7}")
+    for height, width, mines in configs:
+        result = simulate(height, width, mines, args.games, args.seed,
+                          args.processes, args.bitset, args.large,
+                          args.csp)
+        print(f"{f'{height}x{width}':>12} {mines:>6} "
+              f"{result['games_per_second']:>9.1f} "
+              f"{result['win_rate']:>9.1%} "
+              f"{result['guesses_per_game']:>8.2f} "
+              f"{result['inference_per_move'] * 1000:>8.3f} "
+              f"{result['max_knowledge']:>7}")
+
+
+if __name__ == "__main__":
+    main()
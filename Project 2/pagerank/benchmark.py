@@ -0,0 +1,151 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from pagerank import DAMPING, SAMPLES, crawl, iterate_pagerank, sample_pagerank
+
+
+def generate_edges(n, exponent=2.1, dangling=0.1, max_degree=None, seed=None):
+    """
+    Returns (pages, sources, targets) for a random corpus of `n` pages.
+
+    Out-degrees follow a power law with the given exponent, except for
+    a `dangling` fraction of pages, which have no links. Links point to
+    popular pages more often, popularity following the same power law,
+    so in-degrees are skewed as well.
+    """
+    rng = np.random.default_rng(seed)
+    pages = [f"{i}.html" for i in range(n)]
+    if max_degree is None:
+        max_degree = max(1, n - 1)
+
+    # Discrete Pareto samples: P(degree >= k) falls like k^(1 - exponent)
+    degree = np.floor(
+        (1 - rng.random(n)) ** (-1 / (exponent - 1))
+    ).astype(np.int64)
+    degree = np.minimum(degree, max_degree)
+    degree[rng.random(n) < dangling] = 0
+
+    popularity = rng.pareto(exponent - 1, n) + 1
+    sources = np.repeat(np.arange(n), degree)
+    targets = rng.choice(n, size=len(sources), p=popularity / popularity.sum())
+
+    # Drop links from a page to itself, and repeated links
+    keys = np.unique(sources[sources != targets] * n
+                     + targets[sources != targets])
+    return (pages, (keys // n).astype(np.int32),
+            (keys % n).astype(np.int32))
+
+
+def write_corpus(directory, pages, sources, targets):
+    """
+    Writes a corpus as one HTML file per page, in the format of corpus0.
+    """
+    os.makedirs(directory, exist_ok=True)
+    bounds = np.searchsorted(sources, np.arange(len(pages) + 1))
+    for i, page in enumerate(pages):
+        links = "\n".join(
+            f"            <li><a href=\"{pages[target]}\">{pages[target]}</a></li>"
+            for target in targets[bounds[i]:bounds[i + 1]]
+        )
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(
+                "<!DOCTYPE html>\n<html lang=\"en\">\n    <head>\n"
+                f"        <title>{page}</title>\n    </head>\n    <body>\n"
+                f"        <h1>{page}</h1>\n        <ul>\n{links}\n"
+                "        </ul>\n    </body>\n</html>\n"
+            )
+
+
+def write_edge_list(path, pages, sources, targets):
+    """
+    Writes a corpus as a text file with one "source target" link per line.
+    """
+    with open(path, "w") as f:
+        for source, target in zip(sources.tolist(), targets.tolist()):
+            f.write(f"{pages[source]} {pages[target]}\n")
+
+
+def benchmark(sizes, exponent, dangling, samples, seed, directory):
+    """
+    Times crawling, sampling and iteration on generated corpora of growing
+    size, returning one row of results per corpus.
+    """
+    results = []
+    for n in sizes:
+        pages, sources, targets = generate_edges(n, exponent, dangling,
+                                                 seed=seed)
+        corpus_dir = os.path.join(directory, f"corpus{n}")
+        write_corpus(corpus_dir, pages, sources, targets)
+        write_edge_list(os.path.join(directory, f"edges{n}.txt"),
+                        pages, sources, targets)
+        row = {
+            "pages": n,
+            "links": len(sources),
+            "dangling": 1 - len(np.unique(sources)) / n,
+            "times": {}
+        }
+
+        start = time.perf_counter()
+        corpus = crawl(corpus_dir)
+        row["times"]["crawl"] = time.perf_counter() - start
+        start = time.perf_counter()
+        sampled = sample_pagerank(corpus, DAMPING, samples)
+        row["times"]["sample"] = time.perf_counter() - start
+        start = time.perf_counter()
+        iterated = iterate_pagerank(corpus, DAMPING)
+        row["times"]["iterate"] = time.perf_counter() - start
+
+        # Sampling should agree with iteration to within a few standard
+        # errors of the sampled frequencies
+        row["error"] = max(abs(sampled[page] - iterated[page])
+                           for page in corpus)
+        row["agree"] = all(
+            abs(sampled[page] - iterated[page])
+            <= 5 * (iterated[page] / samples) ** 0.5 + 0.001
+            for page in corpus
+        )
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark PageRank on generated corpora."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[100, 1000, 10000])
+    parser.add_argument("--exponent", type=float, default=2.1,
+                        help="power-law exponent of the degree distribution")
+    parser.add_argument("--dangling", type=float, default=0.1,
+                        help="fraction of pages without links")
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--directory",
+                        help="keep generated corpora here instead of "
+                             "in a temporary directory")
+    args = parser.parse_args()
+
+    if args.directory:
+        results = benchmark(args.sizes, args.exponent, args.dangling,
+                            args.samples, args.seed, args.directory)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            results = benchmark(args.sizes, args.exponent, args.dangling,
+                                args.samples, args.seed, directory)
+
+    print(f"{'pages':>8} {'links':>9} {'dangling':>8} {'crawl':>9} "
+          f"{'sample':>9} {'iterate':>9} {'max error':>9} {'agree':>5}")
+    for row in results:
+        times = row["times"]
+        print(f"{row['pages']:>8} {row['links']:>9} {row['dangling']:>8.1%} "
+              f"{times['crawl']:>8.3f}s {times['sample']:>8.3f}s "
+              f"{times['iterate']:>8.3f}s {row['error']:>9.4f} "
+              f"{'yes' if row['agree'] else 'no':>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import os
+import resource
+import sys
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+from pagerank import DAMPING, extract_links, html_files, top_indices
+
+# A link on disk: two int32 page numbers, sorted by target first
+EDGE = np.dtype([("target", np.int32), ("source", np.int32)])
+
+# Links sorted in memory before each run is written out
+RUN_SIZE = 1 << 22
+
+# Links (and pages) processed at a time while iterating
+BLOCK_SIZE = 1 << 20
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python outofcore.py corpus [edge_file]")
+    directory = sys.argv[1]
+    path = sys.argv[2] if len(sys.argv) == 3 else "edges.bin"
+
+    pages = write_edges(directory, path)
+
+    # Only the iteration is traced, as parsing HTML allocates (and frees)
+    # far more than the streaming itself
+    tracemalloc.start()
+    rank = stream_pagerank(path, path + ".degree", DAMPING)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"PageRank Results from Streaming ({len(pages)} pages, "
+          f"{os.path.getsize(path) // EDGE.itemsize} links)")
+    for page in top_indices(rank, 10):
+        print(f"  {pages[page]}: {rank[page]:.4f}")
+    print(f"Peak memory while iterating: {peak / (1 << 20):.1f} MiB")
+    print(f"Peak resident memory: {peak_rss() / (1 << 20):.1f} MiB")
+
+
+def peak_rss():
+    """
+    Return the peak resident memory of this process, in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def edge_keys(edges):
+    """
+    Return each link as one int64, ordered like the (target, source) pairs.
+    """
+    return edges["target"].astype(np.int64) << 32 | edges["source"]
+
+
+def read_edges(path):
+    """
+    Return the links in an edge file, memory-mapped rather than read.
+    """
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=EDGE)
+    return np.memmap(path, dtype=EDGE, mode="r")
+
+
+def write_edges(directory, path, run_size=RUN_SIZE):
+    """
+    Parse a directory of HTML pages without keeping its links in memory.
+
+    Links are written to `path` as (target, source) pairs of page
+    numbers sorted by target, and the number of links on each page to
+    `path` + ".degree". Links are sorted `run_size` at a time into
+    temporary runs, which are then merged. Return the sorted list of
+    page names.
+    """
+    pages = html_files(directory)
+    ids = {page: i for i, page in enumerate(pages)}
+    degree = np.zeros(len(pages), dtype=np.int32)
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(path) or ".") as tmp:
+        runs = []
+        buffer = np.empty(run_size, dtype=EDGE)
+        filled = 0
+
+        def flush(count):
+            run = buffer[:count]
+            run.sort(order=["target", "source"])
+            runs.append(os.path.join(tmp, f"run{len(runs)}"))
+            run.tofile(runs[-1])
+
+        for page in pages:
+            source = ids[page]
+
+            # Only include links to other pages in the corpus
+            links = set(
+                ids[link] for link in extract_links(
+                    os.path.join(directory, page), page
+                ) if link in ids
+            ) - {source}
+            degree[source] = len(links)
+
+            # Copy links into the buffer, writing a run whenever it fills
+            targets = np.fromiter(links, dtype=np.int32, count=len(links))
+            while len(targets):
+                take = min(run_size - filled, len(targets))
+                buffer["target"][filled:filled + take] = targets[:take]
+                buffer["source"][filled:filled + take] = source
+                filled += take
+                targets = targets[take:]
+                if filled == run_size:
+                    flush(filled)
+                    filled = 0
+        if filled or not runs:
+            flush(filled)
+        del buffer
+
+        merge_runs(runs, path)
+    degree.tofile(path + ".degree")
+    return pages
+
+
+def merge_runs(runs, path, block_size=BLOCK_SIZE):
+    """
+    Merge sorted run files into one sorted edge file at `path`.
+
+    Each run is read a share of `block_size` links at a time. Every link
+    up to the smallest last link of the loaded blocks can be written, as
+    no later block holds anything smaller, so each step sorts and writes
+    those links and reloads the blocks that were used up.
+    """
+    if len(runs) == 1:
+        os.replace(runs[0], path)
+        return
+
+    files = [read_edges(run) for run in runs]
+    size = max(1, block_size // len(runs))
+    starts = [0] * len(files)
+    blocks = {}
+
+    with open(path, "wb") as f:
+        while True:
+            for i, edges in enumerate(files):
+                if i not in blocks and starts[i] < len(edges):
+                    block = np.array(edges[starts[i]:starts[i] + size])
+                    blocks[i] = (block, edge_keys(block))
+            if not blocks:
+                break
+
+            bound = min(keys[-1] for _, keys in blocks.values())
+            pieces = []
+            piece_keys = []
+            for i, (block, keys) in list(blocks.items()):
+                count = int(np.searchsorted(keys, bound, side="right"))
+                pieces.append(block[:count])
+                piece_keys.append(keys[:count])
+                starts[i] += count
+                if count == len(block):
+                    del blocks[i]
+                else:
+                    blocks[i] = (block[count:], keys[count:])
+
+            merged = np.concatenate(pieces)
+            order = np.argsort(np.concatenate(piece_keys), kind="stable")
+            merged[order].tofile(f)
+
+
+def stream_pagerank(edge_file, degree_file, damping_factor, tolerance=0.001,
+                    max_iterations=1000, block_size=BLOCK_SIZE):
+    """
+    Return the PageRank vector of a graph stored by `write_edges`,
+    streaming links from disk one block at a time.
+
+    Only the current and the new rank vectors are kept in memory. As
+    links are sorted by target, each block adds to one short range of
+    new ranks. Iteration stops once the L1 residual is within tolerance.
+    """
+    degree = np.memmap(degree_file, dtype=np.int32, mode="r")
+    edges = read_edges(edge_file)
+    N = len(degree)
+    rank = np.full(N, 1 / N)
+    new_rank = np.empty(N)
+
+    for _ in range(max_iterations):
+
+        # Turn ranks into the share given to each link, in place
+        dangling_mass = 0.0
+        for start in range(0, N, block_size):
+            links = degree[start:start + block_size]
+            share = rank[start:start + block_size]
+            dangling_mass += share[links == 0].sum()
+            share /= np.maximum(links, 1)
+
+        new_rank.fill((1 - damping_factor) / N
+                      + damping_factor * dangling_mass / N)
+        for start in range(0, len(edges), block_size):
+            block = edges[start:start + block_size]
+            targets = block["target"]
+            first = int(targets[0])
+            last = int(targets[-1]) + 1
+            new_rank[first:last] += damping_factor * np.bincount(
+                targets - first, weights=rank[block["source"]],
+                minlength=last - first
+            )
+
+        # Turn shares back into ranks to measure the residual
+        residual = 0.0
+        for start in range(0, N, block_size):
+            share = rank[start:start + block_size]
+            share *= np.maximum(degree[start:start + block_size], 1)
+            residual += np.abs(new_rank[start:start + block_size] - share).sum()
+
+        rank, new_rank = new_rank, rank
+        if residual <= tolerance:
+            break
+
+    return rank
+
+
+if __name__ == "__main__":
+    main()